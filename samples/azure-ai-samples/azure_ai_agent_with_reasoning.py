@@ -6,84 +6,162 @@ Uses AzureAIClient (from agent-framework-azure-ai), which:
   • Supports reasoning options (effort, summary) via dict-based options (same as Responses API)
   • Exposes reasoning tokens via response usage_details
 
+A single credential and AIProjectClient are shared by every test so that the
+AAD token and HTTP connection pool are reused. Reasoning options are baked into
+an agent version, so one version per effort level is created up front (in one
+concurrent burst) and each test binds an AzureAIClient to its version.
+
 Prerequisites:
   pip install agent-framework-azure-ai azure-identity
 
 Environment variables:
   AZURE_AI_PROJECT_ENDPOINT          – e.g. https://<account>.services.ai.azure.com/api/projects/<project>
   AZURE_AI_MODEL_DEPLOYMENT_NAME     – e.g. gpt-5-mini
+  AF_DEBUG_USAGE                     – optional; set to print every usage key
 """
 
+import ast
 import asyncio
+import functools
+import math
 import os
+from types import CodeType
+from typing import Annotated
 
+from agent_framework import AgentResponse
 from agent_framework.azure import AzureAIClient
+from azure.ai.projects.aio import AIProjectClient
+from azure.ai.projects.models import AgentVersionDetails
 from azure.identity.aio import AzureCliCredential
 from dotenv import load_dotenv
+from pydantic import Field
 
 load_dotenv(override=True)
 
-
-async def test_reasoning(effort: str) -> None:
-    """Test a specific reasoning effort level and inspect tokens."""
-
-    print(f"\n{'='*60}")
-    print(f"  Reasoning Effort: {effort.upper()}")
-    print(f"{'='*60}")
-
-    async with (
-        AzureCliCredential() as credential,
-        AzureAIClient(
-            credential=credential,
-            agent_name=f"reasoning-test-{effort}",
-            model_deployment_name=os.environ.get("AZURE_AI_MODEL_DEPLOYMENT_NAME", "gpt-5-mini"),
-        ) as client,
-    ):
-
-        response = await client.get_response(
-            "What is 25 * 47 + 133? Walk me through the math step by step.",
-            options={
-                "reasoning": {"effort": effort, "summary": "concise"},
-            },
-        )
-
-        # ── Print response text ──
-        print(f"\nResponse:\n{response}\n")
+# Configuration, read once at import (fails fast if the project endpoint is missing)
+AZURE_AI_PROJECT_ENDPOINT = os.environ["AZURE_AI_PROJECT_ENDPOINT"]
+AZURE_AI_MODEL_DEPLOYMENT_NAME = os.environ.get("AZURE_AI_MODEL_DEPLOYMENT_NAME", "gpt-5-mini")
+AF_DEBUG_USAGE = bool(os.environ.get("AF_DEBUG_USAGE"))
+
+# Same prompt for every effort level so the effort is the only thing that varies.
+# It is far below the 1024-token minimum for prompt caching, so "Cached input" stays 0.
+REASONING_PROMPT = "What is 25 * 47 + 133? Walk me through the math step by step."
+
+REASONING_EFFORTS = ["low", "medium", "high"]
+
+# Names the calculate tool may use, either bare (factorial(7)) or via math (math.factorial(7)).
+_CALC_NAMES = {
+    name: getattr(math, name)
+    for name in ("factorial", "sqrt", "exp", "log", "log10", "sin", "cos", "tan", "pi", "e")
+}
+_CALC_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.operator, ast.unaryop,
+    ast.Constant, ast.Call, ast.Name, ast.Attribute, ast.Load,
+)
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_expression(expression: str) -> CodeType:
+    """Parse and validate an arithmetic expression once, returning its compiled code."""
+    tree = ast.parse(expression.strip(), mode="eval")
+    for node in ast.walk(tree):
+        if not isinstance(node, _CALC_NODES):
+            raise ValueError(f"unsupported syntax: {type(node).__name__}")
+        if isinstance(node, ast.Constant) and type(node.value) not in (int, float):
+            raise ValueError(f"unsupported constant: {node.value!r}")
+        if isinstance(node, ast.Name) and node.id not in _CALC_NAMES and node.id != "math":
+            raise ValueError(f"unknown name: {node.id}")
+        if isinstance(node, ast.Attribute) and not (
+            isinstance(node.value, ast.Name) and node.value.id == "math" and node.attr in _CALC_NAMES
+        ):
+            raise ValueError(f"unknown attribute: {node.attr}")
+        if isinstance(node, ast.Call) and node.keywords:
+            raise ValueError("keyword arguments are not supported")
+    return compile(tree, "<calc>", "eval")
+
+
+def evaluate_expression(expression: str) -> int | float:
+    """Evaluate an arithmetic expression restricted to numbers, operators and math functions."""
+    namespace = {"__builtins__": {}, "math": math, **_CALC_NAMES}
+    return eval(_compile_expression(expression), namespace)  # noqa: S307 - validated AST only
+
+
+async def create_reasoning_agent(project_client: AIProjectClient, effort: str) -> AgentVersionDetails:
+    """Create the agent version used to test one reasoning effort level."""
+    return await project_client.agents.create_version(
+        agent_name=f"reasoning-test-{effort}",
+        definition={
+            "kind": "prompt",
+            "model": AZURE_AI_MODEL_DEPLOYMENT_NAME,
+            "reasoning": {"effort": effort, "summary": "concise"},
+        },
+    )
+
+
+async def test_reasoning(
+    project_client: AIProjectClient, agent: AgentVersionDetails, effort: str
+) -> list[str]:
+    """Test a specific reasoning effort level and inspect tokens.
+
+    Output is collected into a list of lines (rather than printed) so that
+    several efforts can run concurrently without interleaving their output.
+    """
+    lines: list[str] = []
+
+    lines.append(f"\n{'='*60}")
+    lines.append(f"  Reasoning Effort: {effort.upper()}")
+    lines.append(f"{'='*60}")
+
+    async with AzureAIClient(
+        project_client=project_client,
+        agent_name=agent.name,
+        agent_version=agent.version,
+        model_deployment_name=AZURE_AI_MODEL_DEPLOYMENT_NAME,
+    ) as client:
+
+        # Reasoning effort/summary come from the agent version definition
+        response = await client.get_response(REASONING_PROMPT)
+
+        # ── Collect response text ──
+        lines.append(f"\nResponse:\n{response}\n")
 
         # ── Inspect usage & reasoning tokens ──
         usage = response.usage_details
         if usage:
-            print(f"Token Usage:")
-            print(f"  Input tokens:     {usage.get('input_token_count')}")
-            print(f"  Output tokens:    {usage.get('output_token_count')}")
-            print(f"  Total tokens:     {usage.get('total_token_count')}")
+            lines.append(f"Token Usage:")
+            lines.append(f"  Input tokens:     {usage.get('input_token_count')}")
+            lines.append(f"  Output tokens:    {usage.get('output_token_count')}")
+            lines.append(f"  Total tokens:     {usage.get('total_token_count')}")
 
             # UsageDetails is now a TypedDict (plain dict) — reasoning tokens are just dict keys
             reasoning_tokens = usage.get("reasoning_tokens") or usage.get("openai.reasoning_tokens")
             cached_tokens = usage.get("cached_input_tokens") or usage.get("openai.cached_input_tokens")
-            print(f"  Reasoning tokens: {reasoning_tokens}")
-            print(f"  Cached input:     {cached_tokens}")
+            lines.append(f"  Reasoning tokens: {reasoning_tokens}")
+            lines.append(f"  Cached input:     {cached_tokens}")
 
             output_tokens = usage.get('output_token_count')
             if output_tokens and reasoning_tokens:
                 pct = (reasoning_tokens / output_tokens) * 100
-                print(f"  Reasoning ratio:  {pct:.1f}% of output tokens")
+                lines.append(f"  Reasoning ratio:  {pct:.1f}% of output tokens")
 
-            # Print all keys in usage dict
-            print(f"  All usage keys: {dict(usage)}")
+            # Print all keys in usage dict (debug only)
+            if AF_DEBUG_USAGE:
+                lines.append("  All usage keys:")
+                for key, value in usage.items():
+                    lines.append(f"    {key}: {value}")
         else:
-            print("  (No usage details available)")
+            lines.append("  (No usage details available)")
+
+    return lines
 
 
-async def test_with_tools(effort: str) -> None:
+async def test_with_tools(project_client: AIProjectClient, effort: str) -> None:
     """Test reasoning with function calling."""
-    from typing import Annotated
-    from pydantic import Field
 
     def calculate(expression: Annotated[str, Field(description="Math expression to evaluate")]) -> str:
         """Evaluate a math expression."""
         try:
-            result = eval(expression)  # noqa: S307
+            result = evaluate_expression(expression)
             return f"Result: {result}"
         except Exception as e:
             return f"Error: {e}"
@@ -92,26 +170,35 @@ async def test_with_tools(effort: str) -> None:
     print(f"  Reasoning Effort: {effort.upper()} (with function calling)")
     print(f"{'='*60}")
 
-    async with (
-        AzureCliCredential() as credential,
-        AzureAIClient(
-            credential=credential,
-            model_deployment_name=os.environ.get("AZURE_AI_MODEL_DEPLOYMENT_NAME", "gpt-5-mini"),
-        ).as_agent(
-            name=f"reasoning-tools-test-{effort}",
-            instructions="You are a math assistant. Use the calculate tool when asked to compute something.",
-            tools=calculate,
-        ) as agent,
-    ):
-
-        response = await agent.run(
+    chat_client = AzureAIClient(
+        project_client=project_client,
+        model_deployment_name=AZURE_AI_MODEL_DEPLOYMENT_NAME,
+    )
+    # The tool call is forced below, so allow a single tool round trip; the framework
+    # then asks for the final answer with tool_choice="none".
+    chat_client.function_invocation_configuration.max_iterations = 1
+
+    async with chat_client.as_agent(
+        name=f"reasoning-tools-test-{effort}",
+        instructions="You are a math assistant. Use the calculate tool when asked to compute something.",
+        tools=calculate,
+    ) as agent:
+
+        print("\nResponse:")
+        updates = []
+        async for update in agent.run_stream(
             "Calculate the factorial of 7, then divide by 42. Use the calculate tool.",
             options={
                 "reasoning": {"effort": effort},
+                "tool_choice": "required",
             },
-        )
+        ):
+            if update.text:
+                print(update.text, end="", flush=True)
+            updates.append(update)
+        print("\n")
 
-        print(f"\nResponse:\n{response}\n")
+        response = AgentResponse.from_agent_run_response_updates(updates)
 
         usage = response.usage_details
         if usage:
@@ -119,19 +206,38 @@ async def test_with_tools(effort: str) -> None:
             print(f"Token Usage: input={usage.get('input_token_count')}, "
                   f"output={usage.get('output_token_count')}, "
                   f"reasoning={reasoning_tokens}")
-            print(f"  All usage keys: {dict(usage)}")
+            if AF_DEBUG_USAGE:
+                print("  All usage keys:")
+                for key, value in usage.items():
+                    print(f"    {key}: {value}")
 
 
 async def main() -> None:
     print("Agent Service v2 — Reasoning Effort & Token Inspection")
     print("=" * 60)
 
-    # ── Compare reasoning efforts ──
-    for effort in ["low", "medium", "high"]:
-        await test_reasoning(effort)
+    async with (
+        AzureCliCredential() as credential,
+        AIProjectClient(endpoint=AZURE_AI_PROJECT_ENDPOINT, credential=credential) as project_client,
+    ):
+        # ── Create one agent version per effort level in a single burst ──
+        agents = await asyncio.gather(
+            *(create_reasoning_agent(project_client, effort) for effort in REASONING_EFFORTS)
+        )
+
+        # ── Compare reasoning efforts (run concurrently, print in order) ──
+        results = await asyncio.gather(
+            *(
+                test_reasoning(project_client, agent, effort)
+                for agent, effort in zip(agents, REASONING_EFFORTS)
+            )
+        )
+        for lines in results:
+            print("\n".join(lines))
 
-    # ── Test with function calling ──
-    await test_with_tools("high")
+        # ── Test with function calling ──
+        # The tool call is forced, so the model needs little reasoning to pick it
+        await test_with_tools(project_client, "low")
 
 
 if __name__ == "__main__":
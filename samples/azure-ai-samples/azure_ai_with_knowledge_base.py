@@ -30,33 +30,43 @@ Prerequisites:
    - KB_PROJECT_CONNECTION_NAME (your project connection name)
 """
 
+# Configuration, read once at import (fails fast if anything is missing)
+AZURE_AI_PROJECT_ENDPOINT = os.environ["AZURE_AI_PROJECT_ENDPOINT"]
+AZURE_AI_MODEL_DEPLOYMENT_NAME = os.environ["AZURE_AI_MODEL_DEPLOYMENT_NAME"]
+KNOWLEDGE_BASE_MCP_ENDPOINT = os.environ["KNOWLEDGE_BASE_MCP_ENDPOINT"]
+KB_PROJECT_CONNECTION_NAME = os.environ["KB_PROJECT_CONNECTION_NAME"]
+
+# Built once and passed by reference to both the agent version and the chat agent,
+# so the instructions (the prompt prefix) are byte-identical on every request.
+KB_INSTRUCTIONS = """You are a helpful assistant that uses a knowledge base to answer questions.
+You must always use the knowledge base tool to retrieve information.
+Always provide citations using the tool and render them as: `[message_idx:search_idx†source_name]`."""
+
+# MCP tool for knowledge base access
+MCP_KB_TOOL = MCPTool(
+    server_label="knowledge-base",
+    server_url=KNOWLEDGE_BASE_MCP_ENDPOINT,
+    require_approval="never",
+    allowed_tools=["knowledge_base_retrieve"],
+    project_connection_id=KB_PROJECT_CONNECTION_NAME,
+)
+
 
 async def main() -> None:
     async with (
         AzureCliCredential() as credential,
         AIProjectClient(
-            endpoint=os.environ["AZURE_AI_PROJECT_ENDPOINT"], credential=credential
+            endpoint=AZURE_AI_PROJECT_ENDPOINT, credential=credential
         ) as project_client,
     ):
-        # Create MCP tool for knowledge base access
-        mcp_kb_tool = MCPTool(
-            server_label="knowledge-base",
-            server_url=os.environ["KNOWLEDGE_BASE_MCP_ENDPOINT"],
-            require_approval="never",
-            allowed_tools=["knowledge_base_retrieve"],
-            project_connection_id=os.environ["KB_PROJECT_CONNECTION_NAME"],
-        )
-
         # Create agent with knowledge base tool
         azure_ai_agent = await project_client.agents.create_version(
             agent_name="KnowledgeBaseAgent",
             definition={
                 "kind": "prompt",
-                "model": os.environ["AZURE_AI_MODEL_DEPLOYMENT_NAME"],
-                "instructions": """You are a helpful assistant that uses a knowledge base to answer questions.
-You must always use the knowledge base tool to retrieve information.
-Always provide citations using the tool and render them as: `[message_idx:search_idx†source_name]`.""",
-                "tools": [mcp_kb_tool],
+                "model": AZURE_AI_MODEL_DEPLOYMENT_NAME,
+                "instructions": KB_INSTRUCTIONS,
+                "tools": [MCP_KB_TOOL],
             },
             description="Agent using agentic retrieval for knowledge base access",
         )
@@ -75,7 +85,7 @@ Always provide citations using the tool and render them as: `[message_idx:search
             # Create agent instance for interaction
             async with chat_client.create_agent(
                 name=azure_ai_agent.name,
-                instructions=azure_ai_agent.definition.get("instructions"),
+                instructions=KB_INSTRUCTIONS,
             ) as agent:
                 # Interactive loop
                 print("\n" + "=" * 60)
@@ -83,7 +93,7 @@ Always provide citations using the tool and render them as: `[message_idx:search
                 print("=" * 60 + "\n")
 
                 while True:
-                    user_input = input("You: ").strip()
+                    user_input = (await asyncio.to_thread(input, "You: ")).strip()
 
                     if user_input.lower() in ["quit", "exit", "q"]:
                         print("Goodbye!")
@@ -2,6 +2,7 @@
 
 import asyncio
 import os
+import sys
 
 from agent_framework import ChatAgent, CitationAnnotation
 from agent_framework.azure import AzureAIAgentClient
@@ -31,6 +32,12 @@ NOTE: To ensure consistent search tool usage:
 Type 'quit', 'exit', or 'q' to end the conversation.
 """
 
+# Configuration, read once at import (fails fast if anything is missing)
+AZURE_AI_PROJECT_ENDPOINT = os.environ["AZURE_AI_PROJECT_ENDPOINT"]
+AZURE_AI_MODEL_DEPLOYMENT_NAME = os.environ["AZURE_AI_MODEL_DEPLOYMENT_NAME"]
+AI_SEARCH_PROJECT_CONNECTION_ID = os.environ["AI_SEARCH_PROJECT_CONNECTION_ID"]
+AI_SEARCH_INDEX_NAME = os.environ["AI_SEARCH_INDEX_NAME"]
+
 
 async def main() -> None:
     """Main function demonstrating Azure AI agent with multi-turn conversation."""
@@ -40,14 +47,12 @@ async def main() -> None:
     # Create the client and manually create an agent with Azure AI Search tool
     async with (
         AzureCliCredential() as credential,
-        AIProjectClient(endpoint=os.environ["AZURE_AI_PROJECT_ENDPOINT"], credential=credential) as project_client,
-        AgentsClient(endpoint=os.environ["AZURE_AI_PROJECT_ENDPOINT"], credential=credential) as agents_client,
+        AIProjectClient(endpoint=AZURE_AI_PROJECT_ENDPOINT, credential=credential) as project_client,
+        AgentsClient(endpoint=AZURE_AI_PROJECT_ENDPOINT, credential=credential) as agents_client,
     ):
-        ai_search_conn_id = os.environ["AI_SEARCH_PROJECT_CONNECTION_ID"]
-
         # 1. Create Azure AI agent with the search tool
         azure_ai_agent = await agents_client.create_agent(
-            model=os.environ["AZURE_AI_MODEL_DEPLOYMENT_NAME"],
+            model=AZURE_AI_MODEL_DEPLOYMENT_NAME,
             name="GrecoSearchAgent",
             instructions=(
                 "You are a helpful agent that searches information using Azure AI Search. "
@@ -59,8 +64,8 @@ async def main() -> None:
                 "azure_ai_search": {
                     "indexes": [
                         {
-                            "index_connection_id": ai_search_conn_id,
-                            "index_name": os.environ["AI_SEARCH_INDEX_NAME"],
+                            "index_connection_id": AI_SEARCH_PROJECT_CONNECTION_ID,
+                            "index_name": AI_SEARCH_INDEX_NAME,
                             "query_type": "vector_semantic_hybrid",
                             "top_k": 20,
                         }
@@ -86,7 +91,7 @@ async def main() -> None:
                 # 3. Multi-turn conversation loop
                 while True:
                     try:
-                        user_input = input("User: ").strip()
+                        user_input = (await asyncio.to_thread(input, "User: ")).strip()
                     except EOFError:
                         break
 
@@ -98,17 +103,31 @@ async def main() -> None:
 
                     print("Agent: ", end="", flush=True)
 
-                    # Stream the response and collect citations (using thread for context)
+                    # Stream the response and collect citations (using thread for context),
+                    # de-duplicated by URL within the turn
                     citations: list[CitationAnnotation] = []
+                    seen_urls: set[str] = set()
+                    add_citation = citations.append
+                    write = sys.stdout.write
                     async for chunk in agent.run_stream(user_input, thread=thread, tool_choice="required"):
-                        if chunk.text:
-                            print(chunk.text, end="", flush=True)
+                        text = chunk.text
+                        if text:
+                            write(text)
+                            sys.stdout.flush()
 
                         # Collect citations from Azure AI Search responses
-                        for content in getattr(chunk, "contents", []):
-                            annotations = getattr(content, "annotations", [])
-                            if annotations:
-                                citations.extend(annotations)
+                        contents = getattr(chunk, "contents", None)
+                        if not contents:
+                            continue
+                        for content in contents:
+                            annotations = getattr(content, "annotations", None)
+                            if not annotations:
+                                continue
+                            for annotation in annotations:
+                                url = getattr(annotation, "url", None)
+                                if url and url not in seen_urls:
+                                    seen_urls.add(url)
+                                    add_citation(annotation)
 
                     print()
 
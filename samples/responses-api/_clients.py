@@ -0,0 +1,123 @@
+"""
+Azure OpenAI and Azure AI Search clients shared by the Responses API + AI Search samples.
+
+Both clients are created once at import and keep their connection pools for the
+whole session, so every model call and search after the first reuses an open
+TLS connection. Call close_clients() before the event loop shuts down.
+"""
+
+import asyncio
+import os
+from functools import lru_cache
+
+import aiohttp
+import httpx
+from azure.core.credentials import AzureKeyCredential
+from azure.core.pipeline.transport import AioHttpTransport
+from azure.identity.aio import (
+    AzureCliCredential,
+    ChainedTokenCredential,
+    DefaultAzureCredential,
+    ManagedIdentityCredential,
+    get_bearer_token_provider,
+)
+from azure.search.documents.aio import SearchClient
+from dotenv import load_dotenv
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+load_dotenv(override=True)
+
+AZURE_OPENAI_ENDPOINT = os.environ["AZURE_OPENAI_ENDPOINT"]
+AI_SEARCH_ENDPOINT = os.environ["AI_SEARCH_ENDPOINT"]
+AI_SEARCH_INDEX_NAME = os.environ["AI_SEARCH_INDEX_NAME"]
+
+OPENAI_SCOPE = "https://cognitiveservices.azure.com/.default"
+
+# One credential for every service. DefaultAzureCredential (az login, managed identity, etc.)
+# probes several sources in turn; set CHAINED_CREDENTIAL_ENABLED=true to try only managed
+# identity and then the Azure CLI.
+if os.environ.get("CHAINED_CREDENTIAL_ENABLED", "").lower() in ("1", "true", "yes"):
+    credential = ChainedTokenCredential(ManagedIdentityCredential(), AzureCliCredential())
+else:
+    credential = DefaultAzureCredential()
+
+
+@lru_cache(maxsize=None)
+def token_provider_for(scope: str):
+    """Return the shared bearer token provider for a scope."""
+    return get_bearer_token_provider(credential, scope)
+
+
+# Setup Azure OpenAI client with the shared credential.
+# The provider is passed uncalled: the SDK awaits it per request and the credential
+# caches the token until shortly before expiry, so long sessions never send a stale one.
+token_provider = token_provider_for(OPENAI_SCOPE)
+
+openai_client = AsyncOpenAI(
+    base_url=f"{AZURE_OPENAI_ENDPOINT}openai/v1/",
+    api_key=token_provider,
+    # Room for a burst of parallel tool-call round trips while keeping idle connections warm
+    http_client=DefaultAsyncHttpxClient(
+        limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+    ),
+)
+
+
+class PooledAioHttpTransport(AioHttpTransport):
+    """AioHttpTransport whose connection pool outlives the pause between conversation turns.
+
+    aiohttp has no HTTP/2, so parallel searches each use a pooled HTTP/1.1 connection;
+    the pool is sized for a burst of tool calls and idle connections are kept for two
+    minutes (aiohttp's default is 15s) so the next turn skips the TLS handshakes.
+    """
+
+    async def open(self):
+        # The session must be created inside the running loop, so it is built on first use
+        if self.session is None and self._session_owner:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=64, limit_per_host=32, keepalive_timeout=120),
+                # Same session options AioHttpTransport uses for the session it creates itself
+                cookie_jar=aiohttp.DummyCookieJar(),
+                auto_decompress=False,
+                trust_env=self._use_env_settings,
+            )
+        await super().open()
+
+
+# Azure AI Search client - prefer DefaultAzureCredential, fallback to API key if set
+ai_search_api_key = os.environ.get("AI_SEARCH_API_KEY", "").strip()
+if ai_search_api_key:
+    print("AI Search: Using API Key authentication")
+    search_credential = AzureKeyCredential(ai_search_api_key)
+else:
+    print("AI Search: Using DefaultAzureCredential (requires 'Search Index Data Reader' role)")
+    search_credential = credential
+
+search_client = SearchClient(
+    endpoint=AI_SEARCH_ENDPOINT,
+    index_name=AI_SEARCH_INDEX_NAME,
+    credential=search_credential,
+    # The timeouts go to the transport: with a custom transport azure-core ignores them on
+    # the client. Its defaults are both 300s; fail fast on an unreachable endpoint instead
+    transport=PooledAioHttpTransport(connection_timeout=10, read_timeout=60),
+)
+
+
+async def warm_up_clients() -> None:
+    """Fetch the OpenAI token and open the Search connection concurrently, ahead of the first requests.
+
+    The Search side runs a document count through the client's own pipeline, so its
+    token policy caches the Search token and the pooled TLS connection is left open.
+    Failures are only reported: the first real requests authenticate and connect themselves.
+    """
+    try:
+        await asyncio.gather(token_provider(), search_client.get_document_count())
+    except Exception as e:
+        print(f"⚠️ Warm-up failed ({e}), continuing without it")
+
+
+async def close_clients() -> None:
+    """Close the shared clients and the credential."""
+    await search_client.close()
+    await openai_client.close()
+    await credential.close()
@@ -0,0 +1,37 @@
+"""
+Console input for the async Responses API + AI Search samples.
+"""
+
+import asyncio
+import threading
+
+
+def read_line(prompt: str) -> asyncio.Future:
+    """Read a line from stdin without blocking the event loop.
+
+    input() runs in a daemon thread rather than via asyncio.to_thread: on Ctrl+C the
+    pending read cannot be interrupted, and a default-executor thread would keep
+    asyncio.run() from returning until Enter is pressed.
+    EOFError is raised from the returned future like from input().
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def resolve(result=None, error=None):
+        if future.done():  # The read was cancelled, e.g. by Ctrl+C
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def read():
+        try:
+            line = input(prompt)
+        except Exception as e:
+            loop.call_soon_threadsafe(resolve, None, e)
+        else:
+            loop.call_soon_threadsafe(resolve, line)
+
+    threading.Thread(target=read, daemon=True).start()
+    return future
@@ -0,0 +1,326 @@
+"""
+Azure AI Search tool shared by the Responses API + Azure AI Search samples.
+
+search_documents_batch() answers every search_knowledge_base call from one model
+turn: repeated searches run once, document-name lookups share a single
+title-filtered request, and content queries run concurrently as semantic +
+vector hybrid searches.
+
+When AZURE_EMBEDDING_MODEL_NAME is set, content queries are embedded here
+rather than by the index's vectorizer, so a query the model repeats (common
+across tool-call rounds and turns) is embedded once and the same vector also
+feeds the semantic cache.
+"""
+
+import asyncio
+import json
+import os
+import re
+import sys
+
+from azure.search.documents.models import VectorizableTextQuery, VectorizedQuery
+
+from _clients import openai_client, search_client
+from _semantic_cache import SemanticCache, near_duplicates
+
+# Configuration, read once at import
+AI_SEARCH_VECTOR_FIELD = os.getenv("AI_SEARCH_VECTOR_FIELD", "text_vector")
+AI_SEARCH_SEMANTIC_CONFIG = os.getenv("AI_SEARCH_SEMANTIC_CONFIG", "default")
+# Field holding the text shown to the model. Point this at a short field populated at
+# indexing time (e.g. a "chunk_preview" with the first 500 characters) to avoid
+# downloading whole chunks only to trim them here.
+AI_SEARCH_CONTENT_FIELD = os.getenv("AI_SEARCH_CONTENT_FIELD", "chunk")
+SEARCH_SELECT_FIELDS = [AI_SEARCH_CONTENT_FIELD, "title"]
+# Embeds content queries for the semantic cache and duplicate detection
+EMBEDDING_MODEL_NAME = os.environ.get("AZURE_EMBEDDING_MODEL_NAME", "text-embedding-3-small")
+# Vector queries reuse that embedding only when the model is set explicitly, since it must be
+# the one the index's vector field was built with; otherwise the index's vectorizer embeds the text
+CLIENT_SIDE_VECTORS = "AZURE_EMBEDDING_MODEL_NAME" in os.environ
+# Set VERBOSE=1 to log every search hit (title, score, content preview)
+VERBOSE = bool(os.environ.get("VERBOSE"))
+
+# One or two words; the first is taken as the file name (e.g. "insurance_times_bank.pdf")
+_DOC_NAME_RE = re.compile(r"^\s*(\S+)(?:\s+(\S+))?\s*$")
+# Characters with a meaning in simple query syntax, backslash-escaped in title filters
+_QUERY_OPERATOR_RE = re.compile(r'([+|\-"()*~\\])')
+# Words that mark a question about a document's content rather than its name
+_CONTENT_WORDS = frozenset({"content", "article", "about", "what", "how"})
+
+EMBEDDING_CACHE_MAX_ENTRIES = 512
+_embedding_cache: dict[str, list[float]] = {}
+
+# Optional semantic cache in front of content searches: near-duplicate questions reuse earlier results
+semantic_cache = (
+    SemanticCache(threshold=float(os.environ.get("SEMANTIC_CACHE_THRESHOLD", "0.92")))
+    if os.environ.get("SEMANTIC_CACHE_ENABLED", "").lower() in ("1", "true", "yes")
+    else None
+)
+# Content queries are only embedded when something uses the vector
+EMBED_QUERIES = CLIENT_SIDE_VECTORS or semantic_cache is not None
+
+# Define the search tool for the Responses API
+search_tool = {
+    "type": "function",
+    "name": "search_knowledge_base",
+    "description": "Search the knowledge base for documents. For finding a specific document by name, use just the document name (e.g., 'document.pdf'). For content search, use descriptive keywords. Call this tool separately for each document you need to find.",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "query": {
+                "type": "string",
+                "description": "Either a document filename (e.g., 'document.pdf') or descriptive search terms"
+            }
+        },
+        "required": ["query"]
+    }
+}
+
+# Built once and passed by reference as `tools=` on every responses.create call.
+# A tuple (not a MappingProxyType) keeps it immutable while staying JSON-serializable.
+SEARCH_TOOLS = (search_tool,)
+
+
+def document_name(query: str) -> str | None:
+    """Return the document name if the query is just a file name, otherwise None.
+
+    A query counts as a document name when it is at most two words, contains an
+    underscore, and none of its words ask about content.
+    """
+    match = _DOC_NAME_RE.match(query)
+    if match is None or "_" not in query:
+        return None
+    if _CONTENT_WORDS.intersection(word.lower() for word in match.groups() if word):
+        return None
+    return match.group(1).replace(".pdf", "")  # Remove .pdf if present
+
+
+def title_filter(doc_names) -> str:
+    """Build an OData filter matching documents whose title starts with any of the names."""
+    # Escape simple query syntax operators in the name (e.g. the parentheses in
+    # "report(1)"), then double single quotes for the OData string literal
+    escaped = (
+        _QUERY_OPERATOR_RE.sub(r"\\\1", name).replace("'", "''") for name in doc_names
+    )
+    return " or ".join(f"search.ismatchscoring('{name}*', 'title')" for name in escaped)
+
+
+def trim_hit(doc) -> dict:
+    """Keep only the fields of a search hit that are shown to the model (plus the score when VERBOSE)."""
+    hit = {
+        "title": doc.get("title", "N/A"),
+        "content": (doc.get(AI_SEARCH_CONTENT_FIELD) or "")[:500],  # Limit content length
+    }
+    if VERBOSE:
+        hit["score"] = doc.get("@search.score", "N/A")
+    return hit
+
+
+async def take_hits(results, top: int) -> list[dict]:
+    """Read trimmed hits from a search result stream, stopping once `top` are collected."""
+    hits = []
+    async for doc in results:
+        hits.append(trim_hit(doc))
+        if len(hits) == top:
+            break
+    return hits
+
+
+def write_log(log: list[str]) -> None:
+    """Write buffered log lines to stdout in one call."""
+    sys.stdout.write("\n".join(log) + "\n")
+
+
+def format_results(results: list[dict], log: list[str]) -> str:
+    """Return search hits as a JSON string for the model, logging each hit when VERBOSE is set."""
+    if VERBOSE:
+        for i, hit in enumerate(results, 1):
+            log.append(f"\n  [{i}] Title: {hit['title']}")
+            log.append(f"      Score: {hit['score']}")
+            log.append(f"      Content preview: {hit['content'][:100]}...")
+        # The score is only logged, never sent to the model
+        results = [{"title": hit["title"], "content": hit["content"]} for hit in results]
+
+    # Compact separators: indentation would only add tokens to every follow-up model call
+    return json.dumps(results, separators=(",", ":"), ensure_ascii=False)
+
+
+async def embed_query(query: str) -> list[float]:
+    """Return the embedding of a query, reusing it if the same query was embedded before."""
+    embedding = _embedding_cache.pop(query, None)
+    if embedding is None:
+        response = await openai_client.embeddings.create(model=EMBEDDING_MODEL_NAME, input=query)
+        embedding = response.data[0].embedding
+    # Re-inserting keeps dict order least- to most-recently used
+    _embedding_cache[query] = embedding
+    if len(_embedding_cache) > EMBEDDING_CACHE_MAX_ENTRIES:
+        del _embedding_cache[next(iter(_embedding_cache))]
+    return embedding
+
+
+async def duplicate_of(queries: list[str]) -> list[int]:
+    """For each query, return the index of the first query in the list that asks for the same search.
+
+    Document-name queries match on the parsed name; content queries match on their
+    case- and whitespace-normalized text and, when queries are embedded anyway, when
+    their embeddings are near-duplicates.
+    """
+    canonical = list(range(len(queries)))
+    first_by_name: dict[str, int] = {}
+    first_by_text: dict[str, int] = {}
+    content = []
+    for i, query in enumerate(queries):
+        name = document_name(query)
+        if name is not None:
+            canonical[i] = first_by_name.setdefault(name.lower(), i)
+        else:
+            canonical[i] = first_by_text.setdefault(" ".join(query.lower().split()), i)
+            if canonical[i] == i:
+                content.append(i)
+
+    # Embedding only to compare queries would add a round trip before every search
+    if EMBED_QUERIES and len(content) > 1:
+        try:
+            embeddings = await asyncio.gather(*(embed_query(queries[i]) for i in content))
+        except Exception as e:
+            # Every remaining content query simply runs
+            print(f"\n  ⚠️ Embedding failed ({e}), skipping near-duplicate detection")
+            return canonical
+        for i, rep in zip(content, near_duplicates(embeddings)):
+            canonical[i] = content[rep]
+        # Text duplicates follow their representative to its near-duplicate
+        canonical = [canonical[c] for c in canonical]
+    return canonical
+
+
+async def search_documents(query: str, top: int = 5) -> str:
+    """Search Azure AI Search and return results as JSON string."""
+    # Log lines are collected and written once, so concurrent searches don't interleave
+    log = [f"\n  🔍 Searching: {query}"]
+
+    doc_name = document_name(query)
+
+    query_embedding = None
+    try:
+        if doc_name:
+            # Search using the document name - the title match runs server-side as a prefix query
+            log.append(f"  📄 Searching for document: {doc_name}")
+            results = await take_hits(await search_client.search(
+                search_text=None,
+                filter=title_filter([doc_name]),
+                top=top,
+                query_type="simple",
+                select=SEARCH_SELECT_FIELDS
+            ), top)
+            log.append(f"  📄 Found {len(results)} chunks from '{doc_name}'")
+        else:
+            # Near-identical file names embed very closely, so only content queries use the semantic cache
+            if EMBED_QUERIES:
+                try:
+                    query_embedding = await embed_query(query)
+                except Exception as e:
+                    log.append(f"  ⚠️ Embedding failed ({e}), AI Search will vectorize the query")
+            if semantic_cache is not None and query_embedding is not None:
+                hit = semantic_cache.lookup(query_embedding)
+                if hit:
+                    payload, similarity = hit
+                    log.append(f"  ♻️ Semantic cache hit (similarity {similarity:.3f})")
+                    write_log(log)
+                    return payload
+
+            log.append(f"  🧠 Hybrid search (semantic + vector) with field: {AI_SEARCH_VECTOR_FIELD}")
+            results = await take_hits(await search_client.search(
+                search_text=query,
+                top=top,
+                query_type="semantic",
+                semantic_configuration_name=AI_SEARCH_SEMANTIC_CONFIG,
+                vector_queries=[
+                    VectorizedQuery(
+                        vector=query_embedding,
+                        k_nearest_neighbors=top,
+                        fields=AI_SEARCH_VECTOR_FIELD,
+                    )
+                    if CLIENT_SIDE_VECTORS and query_embedding is not None
+                    else VectorizableTextQuery(
+                        text=query,
+                        k_nearest_neighbors=top,
+                        fields=AI_SEARCH_VECTOR_FIELD,
+                    )
+                ],
+                select=SEARCH_SELECT_FIELDS
+            ), top)
+    except Exception as e:
+        log.append(f"  ⚠️ Search failed ({e}), using simple search...")
+        results = await take_hits(await search_client.search(
+            search_text=query,
+            top=top,
+            select=SEARCH_SELECT_FIELDS
+        ), top)
+
+    log.append(f"  📥 Found {len(results)} results")
+    payload = format_results(results, log)
+    write_log(log)
+
+    if semantic_cache is not None and query_embedding is not None:
+        semantic_cache.add(query_embedding, payload)
+    return payload
+
+
+async def search_documents_batch(queries: list[str], top: int = 5) -> list[str]:
+    """Run all searches from one model turn and return one JSON string per query.
+
+    Repeated searches (the same document, or near-identical content queries) run
+    once and share their result. Document-name queries share a single
+    title-filtered request whose hits are assigned back to each name; the
+    remaining queries run concurrently.
+    """
+    canonical = await duplicate_of(queries)
+    distinct = sorted(set(canonical))
+    if len(distinct) < len(queries):
+        print(f"\n  ♻️ Skipping {len(queries) - len(distinct)} duplicate search(es) in this turn")
+
+    doc_names = {i: name for i in distinct if (name := document_name(queries[i]))}
+    payloads: dict[int, str] = {}
+
+    if len(doc_names) > 1:
+        log = [f"\n  📄 Searching for documents: {', '.join(doc_names.values())}"]
+        # Longest name first, so "bank_ab" claims its chunks before "bank_a" can
+        by_length = sorted(
+            ((i, name.lower()) for i, name in doc_names.items()), key=lambda item: -len(item[1])
+        )
+        matches: dict[int, list[dict]] = {i: [] for i in doc_names}
+        page_size = top * len(doc_names)
+        received = 0
+        try:
+            results = await search_client.search(
+                search_text=None,
+                filter=title_filter(doc_names.values()),
+                top=page_size,
+                query_type="simple",
+                select=SEARCH_SELECT_FIELDS
+            )
+            # Hand each hit to the longest name its title starts with (the filter is a prefix
+            # match too) and stop reading once every document has `top`
+            async for doc in results:
+                received += 1
+                title = doc.get("title", "").lower()
+                i = next((i for i, name in by_length if title.startswith(name)), None)
+                if i is not None and len(matches[i]) < top:
+                    matches[i].append(trim_hit(doc))
+                if all(len(hits) == top for hits in matches.values()):
+                    break
+        except Exception as e:
+            log.append(f"  ⚠️ Batched search failed ({e}), searching each document separately...")
+            matches = {i: [] for i in doc_names}
+        page_full = received == page_size
+        for i, hits in matches.items():
+            # A full page may have crowded a document out, so any document short of `top`
+            # (or without hits) gets its own request below
+            if hits and (len(hits) == top or not page_full):
+                log.append(f"  📥 Found {len(hits)} chunks from '{doc_names[i]}'")
+                payloads[i] = format_results(hits, log)
+        write_log(log)
+
+    pending = [i for i in distinct if i not in payloads]
+    results = await asyncio.gather(*(search_documents(queries[i], top) for i in pending))
+    payloads.update(zip(pending, results))
+    return [payloads[i] for i in canonical]
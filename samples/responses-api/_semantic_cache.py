@@ -0,0 +1,111 @@
+"""
+In-process semantic cache for Azure AI Search results.
+
+Queries are matched on the cosine similarity of their embeddings, so a
+rephrased question ("what about X?" vs "tell me about X") can reuse the
+results of an earlier search instead of calling Azure AI Search again.
+
+Entries are stored as parallel arrays: one float32 matrix of L2-normalized
+embeddings plus lists/arrays for payloads and timestamps, so a lookup is a
+single matrix-vector product.
+
+The same embeddings also drive near_duplicates(), which collapses repeated
+searches within one model turn using random-projection LSH buckets.
+"""
+
+import functools
+import time
+
+import numpy as np
+
+
+def normalize(vector) -> np.ndarray:
+    """Return the vector as float32 scaled to unit length."""
+    v = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(v)
+    return v / norm if norm else v
+
+
+@functools.lru_cache(maxsize=4)
+def _projection(dim: int, bits: int, seed: int) -> np.ndarray:
+    """Fixed random hyperplanes (one per signature bit) for a given embedding size."""
+    return np.random.default_rng(seed).standard_normal((dim, bits)).astype(np.float32)
+
+
+def simhash(vector, bits: int = 16, seed: int = 0) -> int:
+    """Return a `bits`-bit random-projection signature; close vectors usually share it."""
+    v = np.asarray(vector, dtype=np.float32)
+    signs = v @ _projection(v.shape[0], bits, seed) > 0
+    return int(signs @ (1 << np.arange(bits)))
+
+
+def near_duplicates(embeddings, threshold: float = 0.95, bits: int = 16) -> list[int]:
+    """Map each embedding to the index of the first earlier one it near-duplicates (or itself).
+
+    Only embeddings sharing an LSH bucket are compared, and a shared bucket is
+    confirmed by cosine similarity so a hash collision never merges unrelated queries.
+    """
+    vectors = [normalize(e) for e in embeddings]
+    buckets: dict[int, list[int]] = {}
+    representatives = []
+    for i, v in enumerate(vectors):
+        bucket = buckets.setdefault(simhash(v, bits), [])
+        rep = next((j for j in bucket if float(vectors[j] @ v) >= threshold), i)
+        if rep == i:
+            bucket.append(i)
+        representatives.append(rep)
+    return representatives
+
+
+class SemanticCache:
+    """Fixed-size embedding cache with cosine-similarity lookup, TTL and LRU eviction."""
+
+    def __init__(self, threshold: float = 0.92, max_size: int = 1024, ttl_seconds: float = 3600):
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._size = 0
+        self._embeddings: np.ndarray | None = None  # (max_size, dim), allocated on first add
+        self._created = np.zeros(max_size, dtype=np.float64)
+        self._last_used = np.zeros(max_size, dtype=np.float64)
+        self._payloads: list[str] = []
+
+    def __len__(self) -> int:
+        return self._size
+
+    def lookup(self, embedding) -> tuple[str, float] | None:
+        """Return (payload, similarity) of the closest fresh entry, or None below the threshold."""
+        if self._size == 0:
+            return None
+
+        now = time.monotonic()
+        scores = self._embeddings[: self._size] @ normalize(embedding)
+        scores[now - self._created[: self._size] > self.ttl_seconds] = -np.inf
+
+        i = int(np.argmax(scores))
+        score = float(scores[i])
+        if score < self.threshold:
+            return None
+
+        self._last_used[i] = now
+        return self._payloads[i], score
+
+    def add(self, embedding, payload: str) -> None:
+        """Store a payload, evicting an expired or least recently used entry when full."""
+        q = normalize(embedding)
+        if self._embeddings is None:
+            self._embeddings = np.zeros((self.max_size, q.shape[0]), dtype=np.float32)
+
+        now = time.monotonic()
+        if self._size < self.max_size:
+            i = self._size
+            self._size += 1
+            self._payloads.append(payload)
+        else:
+            expired = np.flatnonzero(now - self._created > self.ttl_seconds)
+            i = int(expired[0]) if expired.size else int(np.argmin(self._last_used))
+            self._payloads[i] = payload
+
+        self._embeddings[i] = q
+        self._created[i] = now
+        self._last_used[i] = now
@@ -11,27 +11,33 @@ Prerequisites:
 Environment variables:
   AZURE_OPENAI_ENDPOINT=https://<your-resource>.openai.azure.com
   AZURE_OPENAI_RESPONSES_DEPLOYMENT_NAME=gpt-5-mini  # your deployment name
+  AF_DEBUG_USAGE=1  # optional: print every additional_counts key
 """
 
 import asyncio
 import os
-from agent_framework import ChatAgent, ChatMessage
+from agent_framework import ChatAgent, ChatMessage, ChatResponse
 from agent_framework.azure import AzureOpenAIResponsesClient
 from azure.identity import AzureCliCredential
 from dotenv import load_dotenv
 
 load_dotenv(override=True)
 
+# Configuration, read once at import (fails fast if the endpoint is missing)
+AZURE_OPENAI_ENDPOINT = os.environ["AZURE_OPENAI_ENDPOINT"]
+AZURE_OPENAI_RESPONSES_DEPLOYMENT_NAME = os.environ.get("AZURE_OPENAI_RESPONSES_DEPLOYMENT_NAME", "gpt-5-mini")
+AF_DEBUG_USAGE = bool(os.environ.get("AF_DEBUG_USAGE"))
+
 async def main():
     # --- 1. Create the Responses Client targeting gpt-5-mini ---
     client = AzureOpenAIResponsesClient(
         credential=AzureCliCredential(),
-        endpoint=os.environ.get("AZURE_OPENAI_ENDPOINT"),
-        deployment_name=os.environ.get("AZURE_OPENAI_RESPONSES_DEPLOYMENT_NAME", "gpt-5-mini"),
+        endpoint=AZURE_OPENAI_ENDPOINT,
+        deployment_name=AZURE_OPENAI_RESPONSES_DEPLOYMENT_NAME,
         api_version="preview",
     )
 
-    # --- 2. Call get_response with reasoning options ---
+    # --- 2. Stream the response with reasoning options ---
     # The "reasoning" key maps to the OpenAI Responses API ReasoningOptions TypedDict:
     #   effort: Literal["low", "medium", "high"]
     #   summary: Literal["auto", "concise", "detailed"]  (optional)
@@ -40,7 +46,10 @@ async def main():
     print(f"User: {message}\n")
     print("--- Calling with reasoning.effort = 'high' ---\n")
 
-    response = await client.get_response(
+    # --- 3. Print the response text as it arrives ---
+    print("Assistant: ", end="", flush=True)
+    updates = []
+    async for update in client.get_streaming_response(
         message,
         options={
             "reasoning": {
@@ -48,10 +57,14 @@ async def main():
                 # "summary": "concise", # Optional: get a summary of reasoning
             },
         },
-    )
+    ):
+        if update.text:
+            print(update.text, end="", flush=True)
+        updates.append(update)
+    print("\n")
 
-    # --- 3. Print the response text ---
-    print(f"Assistant: {response.text}\n")
+    # Usage arrives on the final update(s); fold the stream back into one response
+    response = ChatResponse.from_chat_response_updates(updates)
 
     # --- 4. Inspect usage details including reasoning tokens ---
     usage = response.usage_details
@@ -79,11 +92,12 @@ async def main():
         else:
             print("  >> WARNING: reasoning_tokens is None - check model/deployment support")
 
-        # Print ALL keys in additional_counts to see everything available
-        print()
-        print("  All additional_counts keys:")
-        for key, value in usage.additional_counts.items():
-            print(f"    {key}: {value}")
+        # Print ALL keys in additional_counts to see everything available (debug only)
+        if AF_DEBUG_USAGE:
+            print()
+            print("  All additional_counts keys:")
+            for key, value in usage.additional_counts.items():
+                print(f"    {key}: {value}")
     else:
         print("  No usage details returned!")
 
@@ -9,55 +9,149 @@ which only supports gpt-4o/gpt-4.1 models.
 
 Prerequisites:
 1. Fill in AI_SEARCH_ENDPOINT and AI_SEARCH_INDEX_NAME in .env
-2. pip install openai azure-search-documents azure-identity python-dotenv
+2. pip install openai azure-search-documents azure-identity aiohttp python-dotenv
+
+Optional:
+- AI_SEARCH_SELECT_FIELDS: comma-separated fields to return (e.g. "title,content").
+  Only these fields are sent back by the service; every field listed must exist in the index.
 """
 
+import asyncio
+import io
 import os
+import sys
+import time
 from dotenv import load_dotenv
-from openai import AzureOpenAI
-from azure.search.documents import SearchClient
+from openai import AsyncAzureOpenAI
+from azure.search.documents.aio import SearchClient
 from azure.core.credentials import AzureKeyCredential
-from azure.identity import DefaultAzureCredential, get_bearer_token_provider
+from azure.identity.aio import DefaultAzureCredential, get_bearer_token_provider
 
 load_dotenv(override=True)
 
+# Configuration, read once at import. Required settings are checked by main() before any call.
+AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT", "")
+AZURE_MODEL_NAME = os.getenv("AZURE_MODEL_NAME", "gpt-5-mini")
+AI_SEARCH_ENDPOINT = os.getenv("AI_SEARCH_ENDPOINT", "")
+AI_SEARCH_INDEX_NAME = os.getenv("AI_SEARCH_INDEX_NAME", "")
+AI_SEARCH_API_KEY = os.getenv("AI_SEARCH_API_KEY", "")
+AI_SEARCH_SEMANTIC_CONFIG = os.getenv("AI_SEARCH_SEMANTIC_CONFIG", "")
+AI_SEARCH_VECTOR_FIELD = os.getenv("AI_SEARCH_VECTOR_FIELD", "")
+AI_SEARCH_SELECT_FIELDS = [f.strip() for f in os.getenv("AI_SEARCH_SELECT_FIELDS", "").split(",") if f.strip()]
+
+REQUIRED_SETTINGS = {
+    "AZURE_OPENAI_ENDPOINT": AZURE_OPENAI_ENDPOINT,
+    "AI_SEARCH_ENDPOINT": AI_SEARCH_ENDPOINT,
+    "AI_SEARCH_INDEX_NAME": AI_SEARCH_INDEX_NAME,
+}
+
+# Keep the prompt prefix byte-identical across calls; only the question and search
+# context (sent last) change per call. The fixed part is under the 1024 tokens prompt
+# caching needs, so this only keeps the ordering stable should the prompt grow.
+SYSTEM_PROMPT = (
+    "You are a helpful assistant that answers questions based on the provided context. "
+    "Always cite your sources using [number] references. "
+    "If the context doesn't contain enough information, say so."
+)
+
+CONTEXT_HEADER = (
+    "Answer the question using the numbered search results that follow it. "
+    "Each result starts with its [number] and title, and results are separated by '---'."
+)
+
+# Shared async clients, built on first use so the credential chain is only probed
+# once per process and every search/LLM call reuses the same connection pools.
+_credential = None
+_token_provider = None
+_openai_client = None
+_search_client = None
+
+# Formatted search context per (normalized query, top_k): (timestamp, document count, context).
+# Repeated questions skip the search round trip entirely while the entry is fresh.
+SEARCH_CACHE_TTL_SECONDS = 300
+SEARCH_CACHE_MAX_ENTRIES = 128
+_search_cache: dict[tuple[str, int], tuple[float, int, str]] = {}
+
+
+def get_credential() -> DefaultAzureCredential:
+    """Return the Entra ID credential shared by Azure OpenAI and Azure AI Search."""
+    global _credential
+    if _credential is None:
+        _credential = DefaultAzureCredential()
+    return _credential
+
+
+def get_openai_client() -> AsyncAzureOpenAI:
+    """Return the shared Azure OpenAI client for the Responses API."""
+    global _token_provider, _openai_client
+    if _openai_client is None:
+        _token_provider = get_bearer_token_provider(get_credential(), "https://cognitiveservices.azure.com/.default")
+        _openai_client = AsyncAzureOpenAI(
+            azure_ad_token_provider=_token_provider,
+            azure_endpoint=AZURE_OPENAI_ENDPOINT,
+            api_version="2025-03-01-preview",
+        )
+    return _openai_client
+
+
+async def warm_up_token() -> None:
+    """Acquire the Entra ID token up front; the provider caches it until expiry."""
+    get_openai_client()
+    await _token_provider()
+
 
 def get_search_client() -> SearchClient:
-    """Create Azure AI Search client."""
-    endpoint = os.environ["AI_SEARCH_ENDPOINT"]
-    index_name = os.environ["AI_SEARCH_INDEX_NAME"]
-    api_key = os.getenv("AI_SEARCH_API_KEY", "")
+    """Return the shared Azure AI Search client."""
+    global _search_client
+    if _search_client is None:
+        if AI_SEARCH_API_KEY:
+            credential = AzureKeyCredential(AI_SEARCH_API_KEY)
+        else:
+            credential = get_credential()
 
-    if api_key:
-        credential = AzureKeyCredential(api_key)
-    else:
-        credential = DefaultAzureCredential()
+        _search_client = SearchClient(
+            endpoint=AI_SEARCH_ENDPOINT,
+            index_name=AI_SEARCH_INDEX_NAME,
+            credential=credential
+        )
+    return _search_client
 
-    return SearchClient(
-        endpoint=endpoint,
-        index_name=index_name,
-        credential=credential
-    )
 
+async def close_clients() -> None:
+    """Close the shared clients and their HTTP sessions."""
+    if _search_client is not None:
+        await _search_client.close()
+    if _openai_client is not None:
+        await _openai_client.close()
+    if _credential is not None:
+        await _credential.close()
 
-def search_documents(query: str, top_k: int = 10) -> list[dict]:
+
+async def search_documents(query: str, top_k: int = 10) -> list[dict]:
     """
-    Search Azure AI Search index and return results.
+    Search Azure AI Search index and return trimmed results.
     
     Uses vector semantic hybrid search when AI_SEARCH_SEMANTIC_CONFIG and 
-    AI_SEARCH_VECTOR_FIELD are set in .env.
+    AI_SEARCH_VECTOR_FIELD are set in .env. Each result is reduced to its
+    title and at most 2000 characters of content while iterating, and
+    iteration stops after top_k results.
     """
     from azure.search.documents.models import VectorizableTextQuery
     
     search_client = get_search_client()
-    semantic_config = os.getenv("AI_SEARCH_SEMANTIC_CONFIG", "")
-    vector_field = os.getenv("AI_SEARCH_VECTOR_FIELD", "")
+    semantic_config = AI_SEARCH_SEMANTIC_CONFIG
+    vector_field = AI_SEARCH_VECTOR_FIELD
     
     search_kwargs = {
         "search_text": query,
         "top": top_k,
+        "include_total_count": False,
     }
     
+    # Let the service drop fields we never read
+    if AI_SEARCH_SELECT_FIELDS:
+        search_kwargs["select"] = AI_SEARCH_SELECT_FIELDS
+    
     if semantic_config:
         search_kwargs["query_type"] = "semantic"
         search_kwargs["semantic_configuration_name"] = semantic_config
@@ -81,112 +175,150 @@ def search_documents(query: str, top_k: int = 10) -> list[dict]:
     else:
         print(f"   Query type: simple full-text")
     
-    results = search_client.search(**search_kwargs)
-    return [dict(result) for result in results]
-
-
-def format_search_results(documents: list[dict]) -> str:
-    """Format search results into context string for the LLM."""
-    if not documents:
-        return "No relevant documents found."
+    results = await search_client.search(**search_kwargs)
     
-    context_parts = []
-    for i, doc in enumerate(documents, 1):
+    documents = []
+    async for result in results:
+        i = len(documents) + 1
         # Common field names - adjust based on your index schema
-        title = doc.get("title") or doc.get("name") or doc.get("fileName") or f"Document {i}"
-        content = doc.get("content") or doc.get("chunk") or doc.get("text") or str(doc)
+        title = result.get("title") or result.get("name") or result.get("fileName") or f"Document {i}"
+        content = result.get("content") or result.get("chunk") or result.get("text") or str(result)
         
         # Truncate long content
         if len(content) > 2000:
             content = content[:2000] + "..."
         
-        context_parts.append(f"[{i}] {title}\n{content}")
+        documents.append({"title": title, "content": content})
+        if len(documents) >= top_k:
+            break
     
-    return "\n\n---\n\n".join(context_parts)
+    return documents
 
 
-def ask_with_search(query: str, model: str = None) -> str:
+def format_search_results(documents: list[dict]) -> str:
+    """Format trimmed search results into context string for the LLM."""
+    if not documents:
+        return "No relevant documents found."
+    
+    return "\n\n---\n\n".join(
+        f"[{i}] {doc['title']}\n{doc['content']}" for i, doc in enumerate(documents, 1)
+    )
+
+
+async def get_search_context(query: str, top_k: int = 10) -> tuple[int, str]:
+    """Return (document count, formatted context) for a query, using the search cache."""
+    key = (query.lower().strip(), top_k)
+    entry = _search_cache.pop(key, None)
+    if entry is not None and time.monotonic() - entry[0] < SEARCH_CACHE_TTL_SECONDS:
+        # Re-insert so the dict stays ordered from least to most recently used
+        _search_cache[key] = entry
+        print("   (cached search results)")
+        return entry[1], entry[2]
+
+    documents = await search_documents(query, top_k=top_k)
+    context = format_search_results(documents)
+
+    _search_cache[key] = (time.monotonic(), len(documents), context)
+    if len(_search_cache) > SEARCH_CACHE_MAX_ENTRIES:
+        del _search_cache[next(iter(_search_cache))]
+    return len(documents), context
+
+
+def print_answer_header(query: str) -> None:
+    """Print the banner shown above each answer."""
+    print("\n" + "=" * 60)
+    print(f"📝 Answer: {query}")
+    print("=" * 60)
+
+
+async def ask_with_search(query: str, model: str = None, echo: bool = False) -> str:
     """
     Query Azure AI Search, then use GPT to generate an answer.
     
     This is the classic RAG pattern that works with all models including GPT-5.
+    The search and the Entra ID token acquisition for Azure OpenAI run concurrently.
+    The answer is streamed; with echo=True it is also written to stdout as it arrives.
     """
-    # 1. Search for relevant documents
+    # 1. Search for relevant documents while the OpenAI token is acquired
     print(f"🔍 Searching for: {query}")
-    documents = search_documents(query, top_k=10)
-    print(f"📄 Found {len(documents)} documents")
-    
-    # 2. Format context
-    context = format_search_results(documents)
-    
-    # 3. Create OpenAI client for Responses API (using Entra ID auth)
-    credential = DefaultAzureCredential()
-    token_provider = get_bearer_token_provider(credential, "https://cognitiveservices.azure.com/.default")
-    
-    client = AzureOpenAI(
-        azure_ad_token_provider=token_provider,
-        azure_endpoint=os.environ['AZURE_OPENAI_ENDPOINT'],
-        api_version="2025-03-01-preview",
+    (document_count, context), _ = await asyncio.gather(
+        get_search_context(query, top_k=10),
+        warm_up_token(),
     )
+    print(f"📄 Found {document_count} documents")
+    
+    # 2. Reuse the shared OpenAI client for Responses API (using Entra ID auth)
+    client = get_openai_client()
     
-    # 4. Use the model to generate an answer
-    model_name = model or os.getenv("AZURE_MODEL_NAME", "gpt-5-mini")
+    # 3. Use the model to generate an answer
+    model_name = model or AZURE_MODEL_NAME
     
     print(f"🤖 Generating answer using {model_name}...")
     
-    response = client.responses.create(
+    answer = io.StringIO()
+    async with client.responses.stream(
         model=model_name,
         input=[
-            {
-                "role": "system",
-                "content": (
-                    "You are a helpful assistant that answers questions based on the provided context. "
-                    "Always cite your sources using [number] references. "
-                    "If the context doesn't contain enough information, say so."
-                )
-            },
+            {"role": "system", "content": SYSTEM_PROMPT},
             {
                 "role": "user",
-                "content": f"Context from search:\n\n{context}\n\n---\n\nQuestion: {query}"
+                "content": [
+                    {"type": "input_text", "text": CONTEXT_HEADER},
+                    {"type": "input_text", "text": f"Question: {query}\n\nContext from search:\n\n{context}"},
+                ]
             }
         ]
-    )
+    ) as stream:
+        if echo:
+            print_answer_header(query)
+        async for event in stream:
+            if event.type == "response.output_text.delta":
+                answer.write(event.delta)
+                if echo:
+                    sys.stdout.write(event.delta)
+                    sys.stdout.flush()
     
-    return response.output_text
+    if echo:
+        print()
+    return answer.getvalue()
 
 
-def main():
+async def main():
     """Main function to demonstrate Azure AI Search with Responses API."""
     print("=" * 60)
     print("Azure AI Search + GPT-5 via Responses API")
     print("=" * 60)
     
     # Check required environment variables
-    required_vars = ["AZURE_OPENAI_ENDPOINT", 
-                     "AI_SEARCH_ENDPOINT", "AI_SEARCH_INDEX_NAME"]
-    
-    missing = [var for var in required_vars if not os.getenv(var) or "your-" in os.getenv(var, "")]
+    missing = [var for var, value in REQUIRED_SETTINGS.items() if not value or "your-" in value]
     if missing:
         print(f"\n❌ Please set these environment variables in .env:")
         for var in missing:
             print(f"   - {var}")
         return
     
-    # Example query - modify as needed
-    query = input("\nEnter your search query (or press Enter for default): ").strip()
-    if not query:
-        query = "What are the main topics covered in the documents?"
+    # Example query - modify as needed. Several queries separated by ';' are answered concurrently.
+    raw = input("\nEnter your search query, or several separated by ';' (or press Enter for default): ")
+    queries = [q.strip() for q in raw.split(";") if q.strip()]
+    if not queries:
+        queries = ["What are the main topics covered in the documents?"]
     
     try:
-        answer = ask_with_search(query)
-        print("\n" + "=" * 60)
-        print("📝 Answer:")
-        print("=" * 60)
-        print(answer)
+        if len(queries) == 1:
+            # A single answer is streamed straight to the console
+            await ask_with_search(queries[0], echo=True)
+        else:
+            # Concurrent answers are buffered so their output does not interleave
+            answers = await asyncio.gather(*(ask_with_search(q) for q in queries))
+            for query, answer in zip(queries, answers):
+                print_answer_header(query)
+                print(answer)
     except Exception as e:
         print(f"\n❌ Error: {e}")
         raise
+    finally:
+        await close_clients()
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -11,176 +11,79 @@ Required Environment Variables:
 
 Optional:
 - AI_SEARCH_API_KEY: If set, uses API key auth for AI Search (otherwise Entra ID)
+- CHAINED_CREDENTIAL_ENABLED: If "true", authenticate with managed identity, then the Azure CLI,
+  instead of probing every DefaultAzureCredential source
 - AI_SEARCH_SEMANTIC_CONFIG: Semantic configuration name (default: "default")
 - AI_SEARCH_VECTOR_FIELD: Vector field name (default: "text_vector")
+- AI_SEARCH_CONTENT_FIELD: Text field returned to the model (default: "chunk")
+- SEMANTIC_CACHE_ENABLED: If "true", reuse search results for near-duplicate content queries
+- SEMANTIC_CACHE_THRESHOLD: Cosine similarity needed for a cache hit (default: 0.92)
+- AZURE_EMBEDDING_MODEL_NAME: Embedding deployment for the cache (default: "text-embedding-3-small").
+  If set, it also embeds vector queries client-side and must match the index's vector field;
+  otherwise the index's vectorizer embeds them
 
 Type 'quit', 'exit', or 'q' to end the conversation.
 """
 
+import asyncio
 import os
 import json
-from openai import OpenAI
-from azure.identity import DefaultAzureCredential, get_bearer_token_provider
-from azure.search.documents import SearchClient
-from azure.core.credentials import AzureKeyCredential
-from dotenv import load_dotenv
-
-load_dotenv(override=True)
-
-# Setup DefaultAzureCredential (uses az login, managed identity, etc.)
-credential = DefaultAzureCredential()
-
-# Setup Azure OpenAI client with DefaultAzureCredential
-token_provider = get_bearer_token_provider(
-    credential, "https://cognitiveservices.azure.com/.default"
-)
-
-client = OpenAI(
-    base_url=f"{os.environ['AZURE_OPENAI_ENDPOINT']}openai/v1/",
-    api_key=token_provider(),
+from _clients import (
+    AI_SEARCH_ENDPOINT, AI_SEARCH_INDEX_NAME, AZURE_OPENAI_ENDPOINT, openai_client, close_clients,
+    warm_up_clients,
 )
+from _console import read_line
+from _search import SEARCH_TOOLS, search_documents_batch
 
-# Azure AI Search client - prefer DefaultAzureCredential, fallback to API key if set
-ai_search_api_key = os.environ.get("AI_SEARCH_API_KEY", "").strip()
-if ai_search_api_key:
-    print("AI Search: Using API Key authentication")
-    search_credential = AzureKeyCredential(ai_search_api_key)
-else:
-    print("AI Search: Using DefaultAzureCredential (requires 'Search Index Data Reader' role)")
-    search_credential = credential
-
-search_client = SearchClient(
-    endpoint=os.environ["AI_SEARCH_ENDPOINT"],
-    index_name=os.environ["AI_SEARCH_INDEX_NAME"],
-    credential=search_credential
-)
+# Configuration, read once at import
+AZURE_MODEL_NAME = os.environ.get("AZURE_MODEL_NAME", "gpt-5-mini")
 
 print("=" * 60)
 print("🔐 Authentication: Using DefaultAzureCredential (az login)")
-print(f"📍 Azure OpenAI Endpoint: {os.environ['AZURE_OPENAI_ENDPOINT']}")
-print(f"🔍 AI Search Endpoint: {os.environ['AI_SEARCH_ENDPOINT']}")
-print(f"📚 AI Search Index: {os.environ['AI_SEARCH_INDEX_NAME']}")
+print(f"📍 Azure OpenAI Endpoint: {AZURE_OPENAI_ENDPOINT}")
+print(f"🔍 AI Search Endpoint: {AI_SEARCH_ENDPOINT}")
+print(f"📚 AI Search Index: {AI_SEARCH_INDEX_NAME}")
 print("=" * 60)
 
-
-def search_documents(query: str, top: int = 5) -> str:
-    """Search Azure AI Search and return results as JSON string."""
-    from azure.search.documents.models import VectorizableTextQuery
-    
-    print(f"\n  🔍 Searching: {query}")
-    
-    # Check if query looks like an exact document name pattern
-    query_words = query.strip().split()
-    is_document_name = (
-        len(query_words) <= 2 and
-        "_" in query and
-        not any(word in query.lower() for word in ["content", "article", "about", "what", "how"])
-    )
-    
-    try:
-        if is_document_name:
-            # Search using the document name - fetch more results then filter by title
-            doc_name = query_words[0].replace(".pdf", "")
-            print(f"  📄 Searching for document: {doc_name}")
-            # Get more results since we'll filter by title afterwards
-            all_results = list(search_client.search(
-                search_text="*",  # Get all documents
-                top=50,  # Fetch more to find matching titles
-                select=["chunk", "title"]
-            ))
-            # Filter results to only include matching titles
-            results = [r for r in all_results if doc_name.lower() in r.get("title", "").lower()][:top]
-            print(f"  📄 Filtered to {len(results)} chunks from '{doc_name}'")
-        else:
-            vector_field = os.getenv("AI_SEARCH_VECTOR_FIELD", "text_vector")
-            semantic_config = os.getenv("AI_SEARCH_SEMANTIC_CONFIG", "default")
-            
-            print(f"  🧠 Hybrid search (semantic + vector) with field: {vector_field}")
-            results = list(search_client.search(
-                search_text=query,
-                top=top,
-                query_type="semantic",
-                semantic_configuration_name=semantic_config,
-                vector_queries=[
-                    VectorizableTextQuery(
-                        text=query,
-                        k_nearest_neighbors=top,
-                        fields=vector_field,
-                    )
-                ],
-                select=["chunk", "title"]
-            ))
-    except Exception as e:
-        print(f"  ⚠️ Search failed ({e}), using simple search...")
-        results = list(search_client.search(
-            search_text=query,
-            top=top,
-            select=["chunk", "title"]
-        ))
-    
-    print(f"  📥 Found {len(results)} results")
-    
-    # Format results for the model
-    formatted = []
-    for doc in results:
-        title = doc.get("title", "N/A")
-        content = doc.get("chunk", "")[:500]
-        formatted.append({"title": title, "content": content})
-    
-    return json.dumps(formatted, indent=2)
-
-
-# Define the search tool
-search_tool = {
-    "type": "function",
-    "name": "search_knowledge_base",
-    "description": "Search the knowledge base for documents. For finding a specific document by name, use just the document name (e.g., 'document.pdf'). For content search, use descriptive keywords. Call this tool separately for each document you need to find.",
-    "parameters": {
-        "type": "object",
-        "properties": {
-            "query": {
-                "type": "string",
-                "description": "Either a document filename (e.g., 'document.pdf') or descriptive search terms"
-            }
-        },
-        "required": ["query"]
-    }
-}
-
 SYSTEM_PROMPT = """You are a helpful assistant that searches a knowledge base to answer questions. 
 When comparing documents, search for each document separately by its exact filename. 
 Make one search call per document. Always use the search tool to find information before answering."""
 
 
-def process_tool_calls(response, previous_response_id: str) -> tuple:
+async def process_tool_calls(response, previous_response_id: str) -> tuple:
     """Process tool calls and return the final response with text output."""
     max_iterations = 5
     current_response = response
     
     for iteration in range(max_iterations):
-        tool_outputs = []
+        search_calls = [
+            output for output in current_response.output
+            if output.type == "function_call" and output.name == "search_knowledge_base"
+        ]
         
-        for output in current_response.output:
-            if output.type == "function_call":
-                if output.name == "search_knowledge_base":
-                    args = json.loads(output.arguments)
-                    search_results = search_documents(args["query"])
-                    tool_outputs.append({
-                        "type": "function_call_output",
-                        "call_id": output.call_id,
-                        "output": search_results
-                    })
-        
-        if not tool_outputs:
+        if not search_calls:
             break
         
+        # All searches requested in one response are answered together
+        search_results = await search_documents_batch(
+            [json.loads(output.arguments)["query"] for output in search_calls]
+        )
+        tool_outputs = [
+            {
+                "type": "function_call_output",
+                "call_id": output.call_id,
+                "output": result
+            }
+            for output, result in zip(search_calls, search_results)
+        ]
+        
         should_allow_tools = iteration < max_iterations - 2
         
-        current_response = client.responses.create(
-            model=os.environ.get("AZURE_MODEL_NAME", "gpt-5-mini"),
+        current_response = await openai_client.responses.create(
+            model=AZURE_MODEL_NAME,
             previous_response_id=current_response.id,
             input=tool_outputs,
-            tools=[search_tool],
+            tools=SEARCH_TOOLS,
             tool_choice="auto" if should_allow_tools else "none",
         )
     
@@ -195,7 +98,7 @@ def process_tool_calls(response, previous_response_id: str) -> tuple:
     return current_response, text_output
 
 
-def main():
+async def main():
     """Multi-turn conversation with Azure AI Search."""
     print("\n" + "=" * 60)
     print("🤖 Azure OpenAI Responses API with AI Search")
@@ -205,10 +108,13 @@ def main():
     # Track conversation using previous_response_id
     previous_response_id = None
     
+    # The token and Search connection are set up while the user types the first message
+    warm_up = asyncio.create_task(warm_up_clients())
+    
     while True:
         try:
-            user_input = input("You: ").strip()
-        except (EOFError, KeyboardInterrupt):
+            user_input = (await read_line("You: ")).strip()
+        except EOFError:
             print("\n\nGoodbye!")
             break
         
@@ -217,6 +123,10 @@ def main():
                 print("\nGoodbye!")
             break
         
+        # Only the first request waits; the warm-up reports its own failure and never raises
+        if not warm_up.done():
+            await warm_up
+        
         print("\nAssistant: ", end="", flush=True)
         
         try:
@@ -228,8 +138,8 @@ def main():
             
             # Create response (with or without conversation context)
             create_kwargs = {
-                "model": os.environ.get("AZURE_MODEL_NAME", "gpt-5-mini"),
-                "tools": [search_tool],
+                "model": AZURE_MODEL_NAME,
+                "tools": SEARCH_TOOLS,
                 "tool_choice": "auto",
                 "input": input_messages,
             }
@@ -237,7 +147,7 @@ def main():
             if previous_response_id:
                 create_kwargs["previous_response_id"] = previous_response_id
             
-            response = client.responses.create(**create_kwargs)
+            response = await openai_client.responses.create(**create_kwargs)
             
             # Check if there are tool calls to process
             has_tool_calls = any(
@@ -247,7 +157,7 @@ def main():
             
             if has_tool_calls:
                 print("(searching...)\n")
-                final_response, text_output = process_tool_calls(response, response.id)
+                final_response, text_output = await process_tool_calls(response, response.id)
                 previous_response_id = final_response.id
             else:
                 # Extract text directly
@@ -265,7 +175,22 @@ def main():
         except Exception as e:
             print(f"\n❌ Error: {e}")
             print()
+    
+    # Stop the warm-up if the user quits before it finishes
+    warm_up.cancel()
+    await asyncio.gather(warm_up, return_exceptions=True)
+
+
+async def run():
+    try:
+        await main()
+    finally:
+        await close_clients()
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        # On Ctrl+C asyncio.run() cancels main(), closes the clients and re-raises it here
+        print("\n\nGoodbye!")